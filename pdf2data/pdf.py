@@ -25,6 +25,7 @@ Iterating over pages
 --------------------
 
 .. autoclass:: PageIterator
+.. autofunction:: process_pages
 
 Converting Pages to Text Snippets
 ---------------------------------
@@ -55,21 +56,57 @@ Find Information in Text Snippets
     Like :func:`find_row_table` but for tables where "rows" are vertical.
 """
 
+import hashlib
+import os
 import re
-from functools import partial
-
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from io import BytesIO
+from itertools import islice
+from operator import attrgetter
+from sys import intern
+
+import numpy as np
 from pdfminer.converter import PDFPageAggregator
 from pdfminer.layout import (
     LAParams, LTAnno, LTChar, LTContainer, LTLine, LTRect, LTTextBoxHorizontal,
     LTTextLineHorizontal)
+from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
 from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 
 # {{{ pdf page iterator
 
+# Part of the page cache key. Change this whenever the gathered text or the
+# format of the cached pages changes, so that stale entries are not used.
+_PAGE_CACHE_VERSION = "pdf2data-page-cache-3"
+
+
 class PageIterator:
-    def __init__(self, document, laparams=None):
+    """
+    .. automethod:: from_bytes
+    """
+
+    def __init__(self, document, laparams=None, page_cache_dir=None):
+        """
+        :arg page_cache_dir: if not *None*, a directory in which the
+            :attr:`lines` of each page are cached. It must be specific
+            to *document* and *laparams*. See :meth:`from_bytes`.
+        """
         if laparams is None:
             laparams = LAParams()
 
@@ -81,10 +118,37 @@ class PageIterator:
 
         self.interpreter = PDFPageInterpreter(rsrcmgr, self.device)
 
+        self.page_cache_dir = page_cache_dir
+
         self._lines = None
         self.i_page = 1
         self.is_at_end = False
 
+    @classmethod
+    def from_bytes(cls, pdf_bytes, laparams=None, cache_dir=None):
+        """
+        :arg pdf_bytes: the contents of a PDF file
+        :arg cache_dir: if not *None*, a directory (such as
+            ``~/.cache/pdf2data``) in which to cache the :attr:`lines`
+            of each page, keyed by the SHA-256 hash of *pdf_bytes*,
+            *laparams*, and the cache format. Subsequent runs on the same
+            document skip page layout.
+        """
+        if laparams is None:
+            laparams = LAParams()
+
+        page_cache_dir = None
+        if cache_dir is not None:
+            hash_obj = hashlib.sha256(_PAGE_CACHE_VERSION.encode())
+            hash_obj.update(pdf_bytes)
+            hash_obj.update(repr(sorted(vars(laparams).items())).encode())
+            page_cache_dir = os.path.join(
+                    os.path.expanduser(cache_dir), hash_obj.hexdigest())
+
+        return cls(
+                PDFDocument(PDFParser(BytesIO(pdf_bytes))), laparams,
+                page_cache_dir=page_cache_dir)
+
     def advance(self):
         try:
             self._page = next(self._page_iterator)
@@ -94,14 +158,180 @@ class PageIterator:
         self._lines = None
         self.i_page += 1
 
+    def _layout_page(self):
+        self.interpreter.process_page(self._page)
+        lines = gather_text(self.device.get_result())
+
+        # Drop references to the page and its layout tree so that they can
+        # be freed while the caller is working with the lines.
+        self.device.result = None
+        self.device.cur_item = None
+        self._page = None
+
+        return lines
+
+    def _read_lines(self):
+        if self.page_cache_dir is None:
+            return self._layout_page()
+
+        cache_path = os.path.join(self.page_cache_dir, f"{self.i_page}.npz")
+        try:
+            return _load_page(cache_path)
+        except FileNotFoundError:
+            pass
+
+        lines = self._layout_page()
+        if not _can_dump_page(lines):
+            return lines
+
+        os.makedirs(self.page_cache_dir, exist_ok=True)
+        # Write to a temporary file first, so that concurrent readers never
+        # see a partially written file.
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            _dump_page(tmp_path, lines)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        return lines
+
     @property
     def lines(self):
         if self._lines is None:
-            self.interpreter.process_page(self._page)
-            self._lines = gather_text(self.device.get_result())
+            self._lines = self._read_lines()
 
         return self._lines
 
+
+# {{{ page cache storage
+
+# Pages are stored as a structure of arrays, so that they can be written and
+# read in bulk, rather than one object at a time as with pickle.
+
+def _can_dump_page(lines):
+    # Font names are usually str, but pdfminer may pass through
+    # other types, see _intern_fontname.
+    return all(
+            ln.fontname is None or type(ln.fontname) in (str, bytes)
+            for ln in lines)
+
+
+def _dump_page(path, lines):
+    fontname_to_id = {}
+    fontname_ids = [
+            -1 if ln.fontname is None
+            else fontname_to_id.setdefault(ln.fontname, len(fontname_to_id))
+            for ln in lines]
+    # Font names may be bytes, see _intern_fontname.
+    fontname_bytes = [
+            fontname if type(fontname) is bytes
+            else fontname.encode("utf-8", "surrogatepass")
+            for fontname in fontname_to_id]
+
+    with open(path, "wb") as outf:
+        np.savez(outf,
+                bboxes=np.array(
+                    [(ln.x0, ln.y0, ln.x1, ln.y1) for ln in lines],
+                    dtype=np.float64).reshape(-1, 4),
+                text_offsets=np.cumsum(
+                    [0] + [len(ln.text) for ln in lines], dtype=np.int64),
+                text_blob=np.frombuffer(
+                    "".join(ln.text for ln in lines).encode(
+                        "utf-8", "surrogatepass"),
+                    dtype=np.uint8),
+                fontname_ids=np.array(fontname_ids, dtype=np.int32),
+                fontname_offsets=np.cumsum(
+                    [0] + [len(fontname) for fontname in fontname_bytes],
+                    dtype=np.int64),
+                fontname_blob=np.frombuffer(
+                    b"".join(fontname_bytes), dtype=np.uint8),
+                fontname_is_bytes=np.array([
+                    type(fontname) is bytes
+                    for fontname in fontname_to_id], dtype=np.bool_))
+
+
+def _load_page(path):
+    with np.load(path) as data:
+        bboxes = data["bboxes"].tolist()
+        text_offsets = data["text_offsets"].tolist()
+        text = data["text_blob"].tobytes().decode("utf-8", "surrogatepass")
+        fontname_ids = data["fontname_ids"].tolist()
+        fontname_offsets = data["fontname_offsets"].tolist()
+        fontname_blob = data["fontname_blob"].tobytes()
+        fontname_table = [
+                fontname_blob[start:end] if is_bytes
+                else intern(fontname_blob[start:end].decode(
+                    "utf-8", "surrogatepass"))
+                for start, end, is_bytes in zip(
+                    fontname_offsets, fontname_offsets[1:],
+                    data["fontname_is_bytes"].tolist())]
+
+    return [
+            TextLine(
+                text=text[start:end],
+                fontname=(
+                    fontname_table[fontname_id] if fontname_id >= 0 else None),
+                bbox=bbox)
+            for bbox, start, end, fontname_id in zip(
+                bboxes, text_offsets, text_offsets[1:], fontname_ids)]
+
+# }}}
+
+
+def _process_page_range(pdf_bytes, laparams, start, stop):
+    document = PDFDocument(PDFParser(BytesIO(pdf_bytes)))
+
+    rsrcmgr = PDFResourceManager()
+    device = PDFPageAggregator(rsrcmgr, laparams=laparams)
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+
+    result = []
+    for page in islice(PDFPage.create_pages(document), start, stop):
+        interpreter.process_page(page)
+        result.append(gather_text(device.get_result()))
+
+    return result
+
+
+def process_pages(pdf_bytes, laparams=None, max_workers=None):
+    """Lay out the pages of a PDF in parallel using a pool of
+    *max_workers* processes.
+
+    :arg pdf_bytes: the contents of a PDF file
+    :arg laparams: a :class:`pdfminer.layout.LAParams` instance
+    :returns: a generator yielding, for each page in order,
+        a list of :class:`TextLine` instances as gathered by
+        :func:`gather_text`.
+    """
+    if laparams is None:
+        laparams = LAParams()
+
+    document = PDFDocument(PDFParser(BytesIO(pdf_bytes)))
+    npages = sum(1 for _ in PDFPage.create_pages(document))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    # Several page ranges per worker for load balancing, but not
+    # one per page, since each needs to re-parse the document.
+    nranges = min(npages, 4*max_workers)
+    if not nranges:
+        return
+
+    bounds = [i*npages // nranges for i in range(nranges+1)]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+                executor.submit(
+                    _process_page_range, pdf_bytes, laparams, start, stop)
+                for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        for future in futures:
+            yield from future.result()
+
 # }}}
 
 
@@ -128,6 +358,8 @@ class TextLine:
         Maximum Y coordinate of bounding box
     """
 
+    __slots__ = ("text", "fontname", "x0", "y0", "x1", "y1")
+
     def __init__(self, text, fontname, bbox):
         self.text = text
         self.fontname = fontname
@@ -149,6 +381,15 @@ class TextLine:
                 bbox=(self.x0, self.y0, self.x1, self.y1))
 
 
+def _intern_fontname(fontname):
+    # pdfminer passes through font names that are not given as PDF names,
+    # e.g. as bytes if given as PDF strings.
+    if type(fontname) is str:
+        return intern(fontname)
+    else:
+        return fontname
+
+
 def gather_text(item, lines=None):
     """
     :arg item: :class:`pdfminer.layout.LTItem`, often a
@@ -162,7 +403,7 @@ def gather_text(item, lines=None):
     if isinstance(item, LTChar):
         lines.append(TextLine(
             text="".join(item._text),
-            fontname=item.fontname,
+            fontname=_intern_fontname(item.fontname),
             bbox=item.bbox))
 
     elif isinstance(item, LTAnno):
@@ -170,28 +411,35 @@ def gather_text(item, lines=None):
         assert not item._text.strip(), item._text
 
     elif isinstance(item, LTTextBoxHorizontal):
+        # local names for the per-character loop below
+        lt_char = LTChar
+        lt_anno = LTAnno
+
         for line in item:
             assert isinstance(line, LTTextLineHorizontal)
 
             line_contents = []
             fontname = None
             for line_item in line:
-                if isinstance(line_item, LTAnno):
-                    # Assert that nothing useful is here.
-                    assert not line_item._text.strip(), line_item._text
-
-                elif isinstance(line_item, LTChar):
+                line_item_type = type(line_item)
+                if line_item_type is lt_char:
                     line_contents.append(line_item._text)
 
                     if fontname is None:
-                        fontname = line_item.fontname
-                    elif fontname != line_item.fontname:
-                        from warnings import warn
-                        warn(
-                                "Font name changed mid-line, "
-                                f"from '{fontname}' "
-                                f"to '{line_item.fontname}'. "
-                                "Using initial font name for line.")
+                        # Many lines share a font, let them share the name.
+                        fontname = _intern_fontname(line_item.fontname)
+                    elif __debug__:
+                        if fontname != line_item.fontname:
+                            from warnings import warn
+                            warn(
+                                    "Font name changed mid-line, "
+                                    f"from '{fontname}' "
+                                    f"to '{line_item.fontname}'. "
+                                    "Using initial font name for line.")
+
+                elif line_item_type is lt_anno:
+                    # Assert that nothing useful is here.
+                    assert not line_item._text.strip(), line_item._text
 
                 else:
                     raise ValueError(
@@ -233,13 +481,100 @@ def overlap(a_min, a_max, b_min, b_max):
     return max(0, end_overlap - begin_overlap)
 
 
+@lru_cache(maxsize=256)
+def _compile(regex_str):
+    return re.compile(regex_str)
+
+
+@lru_cache(maxsize=64)
+def _compile_hyperscan_db(regex_strs):
+    db = hyperscan.Database()
+    db.compile(
+            expressions=[regex.encode() for regex in regex_strs],
+            ids=list(range(len(regex_strs))),
+            elements=len(regex_strs),
+            flags=(
+                hyperscan.HS_FLAG_UTF8
+                | hyperscan.HS_FLAG_UCP
+                | hyperscan.HS_FLAG_SINGLEMATCH))
+
+    return db
+
+
+def _get_regex_match_mask_func(regexes, use_hyperscan=False):
+    """
+    :arg regexes: A list of regular expressions, or strings
+         that can be compiled to them.
+    :arg use_hyperscan: if *True*, *regexes* must be strings, which
+        are interpreted by :mod:`hyperscan` (see
+        :func:`find_attr_group_matching`).
+    :returns: a function that, given a string, returns an integer
+        in which bit *i* is set if and only if ``regexes[i]`` matches
+        that string.
+    """
+    def make_re_match_mask_func(regexes):
+        regexes = [
+                _compile(regex) if isinstance(regex, str) else regex
+                for regex in regexes]
+
+        def get_match_mask(text):
+            mask = 0
+            for i, regex in enumerate(regexes):
+                if regex.search(text) is not None:
+                    mask |= 1 << i
+            return mask
+
+        return get_match_mask
+
+    if not use_hyperscan or not regexes:
+        return make_re_match_mask_func(regexes)
+
+    if hyperscan is None:
+        raise ImportError("use_hyperscan=True requires hyperscan")
+    if not all(isinstance(regex, str) for regex in regexes):
+        raise TypeError("use_hyperscan=True requires regexes given as strings")
+
+    try:
+        db = _compile_hyperscan_db(tuple(regexes))
+    except hyperscan.error as e:
+        raise ValueError(f"hyperscan cannot compile regexes: {e}") from e
+
+    # The cached database is shared, but its built-in scratch space cannot
+    # be used by more than one scan at a time.
+    scratch = hyperscan.Scratch(db)
+
+    re_get_match_mask = None
+
+    def get_match_mask(text):
+        try:
+            text_bytes = text.encode()
+        except UnicodeEncodeError:
+            # Text not representable in UTF-8 (e.g. containing lone
+            # surrogates) cannot be scanned by hyperscan.
+            nonlocal re_get_match_mask
+            if re_get_match_mask is None:
+                re_get_match_mask = make_re_match_mask_func(regexes)
+            return re_get_match_mask(text)
+
+        mask = 0
+
+        def on_match(regex_id, *args):
+            nonlocal mask
+            mask |= 1 << regex_id
+
+        db.scan(text_bytes, match_event_handler=on_match, scratch=scratch)
+        return mask
+
+    return get_match_mask
+
+
 def find_lines_with(regex, lines):
     """
     :arg regex: a regular expression or a string that can be compiled to one
     :returns: a list of tuples ``(text_line, match_object)` for found matches
     """
     if isinstance(regex, str):
-        regex = re.compile(regex)
+        regex = _compile(regex)
     result = []
     for ln in lines:
         match = regex.search(ln.text)
@@ -248,26 +583,152 @@ def find_lines_with(regex, lines):
     return result
 
 
-def get_attr_lookup(lines, attr_name):
+_GLOBAL_FLAGS_RE = re.compile(r"\(\?([aiLmsux]+)\)")
+
+# Numbered backreferences and conditionals would refer to the wrong group
+# once a regex is embedded into a larger one.
+_NUMBERED_GROUP_REF_RE = re.compile(r"\\[1-9]|\(\?\(\d")
+
+
+def _scope_global_flags(regex):
+    """Turn inline flags at the start of *regex*, which apply to the whole
+    regex, into a group that applies them only to its contents, so that
+    the result can be embedded into a larger regex.
+    """
+    flags = ""
+    while True:
+        flags_match = _GLOBAL_FLAGS_RE.match(regex)
+        if flags_match is None:
+            break
+        flags += flags_match.group(1)
+        regex = regex[flags_match.end():]
+
+    if flags:
+        return f"(?{flags}:{regex})"
+    else:
+        return regex
+
+
+def _combine_regexes(regexes):
+    """
+    :returns: a compiled regex matching any of *regexes*, in which a match
+        of ``regexes[i]`` is captured in a group named ``_pdf2data_i``,
+        or *None* if *regexes* cannot be combined.
+    """
+    for regex in regexes:
+        if (_compile(regex).groups
+                and _NUMBERED_GROUP_REF_RE.search(regex) is not None):
+            return None
+
+    try:
+        return _compile("|".join(
+                f"(?P<_pdf2data_{i}>{_scope_global_flags(regex)})"
+                for i, regex in enumerate(regexes)))
+    except re.error:
+        return None
+
+
+def find_lines_with_many(regexes, lines):
+    """
+    :arg regexes: a list of strings containing regular expressions
+    :returns: a list of tuples ``(text_line, regex_index, match_object)``
+        for lines matching any of *regexes*, where *regex_index* is the
+        index of the matching entry in *regexes*.
+
+    If more than one of *regexes* matches a line, only the leftmost
+    match (and among those, the one of the first matching regex) is
+    reported.
+
+    If possible, all *regexes* are combined into a single alternation,
+    so that each line is searched only once. If they cannot be combined
+    (e.g. because of numbered backreferences, or group names used in
+    more than one of them), each line is searched for each of *regexes*.
+    """
+    regexes = list(regexes)
+    for regex in regexes:
+        if not isinstance(regex, str):
+            raise TypeError(
+                    f"regexes must be strings, got '{type(regex).__name__}'")
+
+    compiled_regexes = [_compile(regex) for regex in regexes]
+    combined_regex = _combine_regexes(regexes)
+
+    def search_separately(text):
+        matches = [
+                (match.start(), i, match)
+                for i, regex in enumerate(compiled_regexes)
+                for match in [regex.search(text)]
+                if match is not None]
+        if not matches:
+            return None
+
+        _, i, match = min(matches, key=lambda m: m[:2])
+        return i, match
+
+    result = []
+    for ln in lines:
+        if combined_regex is not None:
+            combined_match = combined_regex.search(ln.text)
+            if combined_match is None:
+                continue
+
+            i = int(combined_match.lastgroup[len("_pdf2data_"):])
+            # Obtain a match object with the group numbering
+            # of the original regex.
+            match = compiled_regexes[i].match(ln.text, combined_match.start())
+            if match is not None:
+                result.append((ln, i, match))
+                continue
+
+            # The regex did not match by itself what it matched as part of
+            # the combined regex, e.g. due to group references.
+
+        found = search_separately(ln.text)
+        if found is not None:
+            i, match = found
+            result.append((ln, i, match))
+
+    return result
+
+
+def get_attr_lookup(lines, attr_name, tol=None):
     """
     :arg lines: a list of :class:`TextLine` instances
     :arg attr_name: A string, e.g. ``"y0"``, an attribute
         of :class:`TextLine`
+    :arg tol: if not *None*, group together values of the attribute
+        that are at most *tol* larger than the smallest value in the group.
+        Each group is keyed by that smallest value.
     :returns: A dictionary of strings mapping values of
         the given attribute to lists of :class:`TextLine`
         sharing that attribute.
 
     This function can be used to identify lines of text or
-    rows in a table. Note that it relies on *exactly* matching
-    coordinates.
+    rows in a table. Note that, unless *tol* is given, it relies on
+    *exactly* matching coordinates.
     """
-    result = {}
+    get_attr = attrgetter(attr_name)
+
+    if tol is not None:
+        result = {}
+        group_start = None
+        for ln in sorted(lines, key=get_attr):
+            attr_value = get_attr(ln)
+            if group_start is None or attr_value - group_start > tol:
+                group_start = attr_value
+                group = result[group_start] = []
+            group.append(ln)
+
+        return result
+
+    result = defaultdict(list)
     for ln in lines:
-        result.setdefault(getattr(ln, attr_name), []).append(ln)
-    return result
+        result[get_attr(ln)].append(ln)
+    return dict(result)
 
 
-def find_attr_group_matching(regexes, attr_name, lines):
+def find_attr_group_matching(
+        regexes, attr_name, lines, tol=None, use_hyperscan=False):
     """ Find a group of :class:`TextLine` instances containing
     matches of *regexes*. Can be used to find table headers
     with known content.
@@ -277,174 +738,241 @@ def find_attr_group_matching(regexes, attr_name, lines):
     :arg attr_name: A string, e.g. ``"y0"``, an attribute
         of :class:`TextLine`
     :arg lines: a list of :class:`TextLine` instances
+    :arg tol: if not *None*, group attribute values as described
+        in :func:`get_attr_lookup`.
+    :arg use_hyperscan: if *True*, match all *regexes* (which must then be
+        strings) in one pass using :mod:`hyperscan`, which is faster
+        for many regexes. Note that :mod:`hyperscan` uses the PCRE
+        dialect of regular expressions rather than that of :mod:`re`,
+        so that some regexes will match differently. (For example,
+        ``x{,2}`` matches literal text, and ``\\Z`` matches before
+        a trailing newline.) Text that cannot be encoded in UTF-8
+        is matched using :mod:`re`.
     :returns: Finds the attribute value (e.g. ``"y0"``)
         shared by the :class:`TextLine` instances
         containing matches of *regexes*.
     """
 
-    regexes = [
-            re.compile(regex) if isinstance(regex, str) else regex
-            for regex in regexes]
-
-    attr_lookup = get_attr_lookup(lines, attr_name)
-    result = [
-            attr_value
-            for attr_value, row_lines in attr_lookup.items()
-            if all(
-                any(
-                    regex.search(ln.text) is not None
-                    for ln in row_lines)
-                for regex in regexes)]
-
-    if len(result) < 1:
+    if tol is None:
+        get_attr = attrgetter(attr_name)
+        lines_and_attr_values = ((ln, get_attr(ln)) for ln in lines)
+    else:
+        lines_and_attr_values = (
+                (ln, attr_value)
+                for attr_value, group_lines in get_attr_lookup(
+                    lines, attr_name, tol).items()
+                for ln in group_lines)
+
+    regexes = list(regexes)
+    get_match_mask = _get_regex_match_mask_func(regexes, use_hyperscan)
+    all_matched_mask = (1 << len(regexes)) - 1
+
+    group_match_masks = {}
+    for ln, attr_value in lines_and_attr_values:
+        mask = group_match_masks.get(attr_value, 0)
+        if mask != all_matched_mask:
+            mask |= get_match_mask(ln.text)
+        group_match_masks[attr_value] = mask
+
+    found_attr_value = None
+    for attr_value, mask in group_match_masks.items():
+        if mask == all_matched_mask:
+            if found_attr_value is not None:
+                raise RuntimeError("more than one group found matching")
+            found_attr_value = attr_value
+
+    if found_attr_value is None:
         raise GroupNotFound()
-    if len(result) > 1:
-        raise RuntimeError("more than one group found matching")
 
-    attr_value, = result
-    return attr_value
+    return found_attr_value
 
 
 def merge_overlapping_rows(rows, row_min_attr_name, row_max_attr_name):
+    get_row_min = attrgetter(row_min_attr_name)
+    get_row_max = attrgetter(row_max_attr_name)
+
     def get_row_extent(row):
         return (
-            min(getattr(line, row_min_attr_name) for line in row.values()),
-            max(getattr(line, row_max_attr_name) for line in row.values()))
+            min(get_row_min(line) for line in row.values()),
+            max(get_row_max(line) for line in row.values()))
 
-    if not rows:
+    if len(rows) <= 1:
         return rows
 
     new_rows = []
 
     row = rows[0]
-    i_row = 1
+    row_min, row_max = get_row_extent(row)
 
-    while i_row < len(rows):
+    for next_row in rows[1:]:
         # row is valid and still needs to be added to new_rows
-        next_row = rows[i_row]
-
-        row_min, row_max = get_row_extent(row)
         next_row_min, next_row_max = get_row_extent(next_row)
 
         if overlap(row_min, row_max, next_row_min, next_row_max):
+            overwrites_lines = not row.keys().isdisjoint(next_row)
             row.update(next_row)
-            i_row += 1
+
+            if overwrites_lines:
+                # Lines that were replaced no longer count towards the extent.
+                row_min, row_max = get_row_extent(row)
+            else:
+                row_min = min(row_min, next_row_min)
+                row_max = max(row_max, next_row_max)
 
         else:
             new_rows.append(row)
-            i_row += 1
             row = next_row
+            row_min, row_max = next_row_min, next_row_max
 
     new_rows.append(row)
 
     return new_rows
 
 
-def find_table(
-        headers, lines, row_min_attr_name, row_max_attr_name,
-        col_min_attr_name, col_max_attr_name,
-        reverse_sort, heading_bias="centered"):
-    headers = sorted(headers, key=lambda ln: getattr(ln, col_min_attr_name))
-    row_lookup = get_attr_lookup(lines, row_min_attr_name)
+def _bboxes_as_arrays(lines, attrs=("x0", "x1", "y0", "y1")):
+    """
+    :arg lines: a list of :class:`TextLine` instances
+    :returns: a dictionary mapping each attribute name in *attrs* to
+        a :class:`numpy.ndarray` of that attribute's values across *lines*.
+    """
+    get_coords = attrgetter(*attrs)
+    coords = np.array(
+            [get_coords(ln) for ln in lines], dtype=np.float64
+            ).reshape(len(lines), len(attrs))
 
-    # {{{ filll col_boundary_estimates
+    return dict(zip(attrs, coords.T.copy()))
 
-    col_boundary_estimates = []
-    for i in range(len(headers)-1):
-        hi = headers[i]
-        hip1 = headers[i+1]
 
-        ci = 0.5*(
-                getattr(hi, col_min_attr_name)
-                + getattr(hi, col_max_attr_name))
+def _overlap_matrix_numpy(a_min, a_max, b_min, b_max):
+    """Like :func:`overlap`, but for all pairs of intervals given by
+    the arrays *a_min*, *a_max* and *b_min*, *b_max*. Rows of the
+    result correspond to *a*, columns to *b*.
+    """
+    return np.maximum(0,
+            np.minimum(a_max[:, np.newaxis], b_max)
+            - np.maximum(a_min[:, np.newaxis], b_min))
+
+
+if njit is None:
+    _overlap_matrix = _overlap_matrix_numpy
+else:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _overlap_matrix(a_min, a_max, b_min, b_max):
+        result = np.empty((len(a_min), len(b_min)))
+        for i in prange(len(a_min)):
+            for j in range(len(b_min)):
+                d = min(a_max[i], b_max[j]) - max(a_min[i], b_min[j])
+                # branch-free version of max(0, d)
+                result[i, j] = (d + abs(d)) * 0.5
 
-        cip1 = 0.5*(
-                getattr(hip1, col_min_attr_name)
-                + getattr(hip1, col_max_attr_name))
+        return result
 
-        col_boundary_estimates.append(0.5*(ci+cip1))
 
-    # }}}
+def find_table(
+        headers, lines, row_min_attr_name, row_max_attr_name,
+        col_min_attr_name, col_max_attr_name,
+        reverse_sort, heading_bias="centered"):
+    if heading_bias not in ["centered", "min"]:
+        raise ValueError("unrecognized heading bias")
 
-    rows = []
-    for row_lookup_key in sorted(row_lookup, reverse=reverse_sort):
-        row_lines = row_lookup[row_lookup_key]
-        row = {}
-        rows.append(row)
-        for ln in row_lines:
+    headers = sorted(headers, key=attrgetter(col_min_attr_name))
+    row_lookup = get_attr_lookup(lines, row_min_attr_name)
+
+    # {{{ gather table lines with their row numbers
+
+    table_lines = []
+    line_row_indices = []
+    for i_row, row_lookup_key in enumerate(
+            sorted(row_lookup, reverse=reverse_sort)):
+        for ln in row_lookup[row_lookup_key]:
             if not ln.text.strip():
                 # White space causes lots of grief for no reason: It's not
                 # visible in the PDF, so we're somewhat OK assuming it's
                 # insignificant.
                 continue
 
-            lmin = getattr(ln, col_min_attr_name)
-            lmax = getattr(ln, col_max_attr_name)
-            assert lmin <= lmax
-
-            lctr = (lmin+lmax)*0.5
-
-            overlaps_and_headers = [
-                    (overlap(
-                        getattr(h, col_min_attr_name),
-                        getattr(h, col_max_attr_name),
-                        lmin, lmax), h)
-                    for h in headers
-                    ]
-            possible_headers = [
-                    (ovl, h) for ovl, h in overlaps_and_headers
-                    if ovl]
-
-            if len(possible_headers) == 0:
-                # no overlap at all, typically a very short entry
-
-                if heading_bias == "centered":
-                    # fall back to minimum center distance
-                    _, h = min(
-                            (abs(
-                                0.5*(
-                                    getattr(h, col_min_attr_name)
-                                    + getattr(h, col_max_attr_name))
-                                - lctr), h)
-                            for ihead, h in enumerate(headers)
-                            # If last column: never mind
-                            if ihead >= len(col_boundary_estimates)
-                            # If the left boundary of the entry is to the left
-                            # of this header's right column boundary.
-                            or lmin <= col_boundary_estimates[ihead]
-                            )
-                    key = h.text
-
-                elif heading_bias == "min":
-                    # Use next-nearest left overlapping header
-
-                    _, h = max(
-                            (getattr(h, col_min_attr_name), h)
-                            for h in headers
-                            if getattr(h, col_min_attr_name) <= lmin)
-                    key = h.text
+            table_lines.append(ln)
+            line_row_indices.append(i_row)
 
-                else:
-                    raise ValueError("unrecognized heading bias")
+    # }}}
 
-            elif len(possible_headers) == 1:
-                (_, h), = possible_headers
-                key = h.text
+    if not headers:
+        if table_lines:
+            raise ValueError("no headers found for table entries")
+        return [{} for _ in row_lookup]
 
-            elif len(possible_headers) > 1:
-                # Use left/topmost overlapping header
+    col_attr_names = (col_min_attr_name, col_max_attr_name)
+    h_min, h_max = _bboxes_as_arrays(headers, col_attr_names).values()
+    l_min, l_max = _bboxes_as_arrays(table_lines, col_attr_names).values()
+    assert (l_min <= l_max).all()
 
-                _, h = min(
-                        (getattr(h, col_min_attr_name), h)
-                        for ovl, h in possible_headers)
-                key = h.text
+    ovl = _overlap_matrix(l_min, l_max, h_min, h_max)
+    overlaps = ovl > 0
 
-            if key in row:
-                raise ValueError(f"duplicate assignment of key '{key}'")
-            else:
-                row[key] = ln
+    # If there are overlapping headers, use the left/topmost one. Since
+    # headers are sorted, that's the first one. In the common case of
+    # exactly one overlapping header, that's the one.
+    header_indices = overlaps.argmax(axis=1)
+
+    no_overlap = ~overlaps.any(axis=1)
+    if no_overlap.any():
+        # no overlap at all, typically a very short entry
+        nol_min = l_min[no_overlap]
+
+        if heading_bias == "centered":
+            # fall back to minimum center distance
+            h_ctr = 0.5*(h_min + h_max)
+            col_boundary_estimates = 0.5*(h_ctr[:-1] + h_ctr[1:])
+
+            ctr_dist = np.abs(
+                    h_ctr - 0.5*(nol_min + l_max[no_overlap])[:, np.newaxis])
+
+            # Only consider headers whose right column boundary is to the
+            # right of the left boundary of the entry. The last column
+            # has no right boundary.
+            ctr_dist[:, :-1][
+                    nol_min[:, np.newaxis] > col_boundary_estimates] = np.inf
+
+            header_indices[no_overlap] = ctr_dist.argmin(axis=1)
+
+        elif heading_bias == "min":
+            # Use next-nearest left overlapping header, i.e. the last one
+            # (in sorted order) starting to the left of the entry
+            nearest_left = np.searchsorted(h_min, nol_min, side="right") - 1
+            if (nearest_left < 0).any():
+                raise ValueError("no header found to the left of entry")
+
+            header_indices[no_overlap] = nearest_left
+
+        else:
+            raise AssertionError()
+
+    # {{{ assemble rows
+
+    # Distinct headers may have the same text, in which case they share
+    # a key.
+    key_to_index = {}
+    header_key_indices = np.array([
+            key_to_index.setdefault(h.text, len(key_to_index))
+            for h in headers], dtype=np.intp)
+    keys = list(key_to_index)
+
+    row_arrays = [[None]*len(keys) for _ in row_lookup]
+    for ln, i_row, i_key in zip(
+            table_lines, line_row_indices,
+            header_key_indices[header_indices].tolist()):
+        row_array = row_arrays[i_row]
+
+        if row_array[i_key] is not None:
+            raise ValueError(f"duplicate assignment of key '{keys[i_key]}'")
+        else:
+            row_array[i_key] = ln
+
+    # }}}
 
-    return rows
+    return [
+            {key: ln for key, ln in zip(keys, row_array) if ln is not None}
+            for row_array in row_arrays]
 
 
 find_row_table = partial(
@@ -0,0 +1,220 @@
+__copyright__ = "Copyright (C) 2019 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+__doc__ = """
+PDFium Backend
+--------------
+
+An alternative to the :mod:`pdfminer`-based page iteration in
+:mod:`pdf2data.pdf`, using
+`pypdfium2 <https://github.com/pypdfium2-team/pypdfium2>`__,
+which is typically much faster. It produces the same kind of
+:class:`~pdf2data.pdf.TextLine` instances, so that the functions in
+:mod:`pdf2data.pdf` for finding information in them apply unchanged.
+
+Characters are grouped into lines using the *char_margin* and *line_overlap*
+criteria of :class:`pdfminer.layout.LAParams`, and coordinates are given in
+the (possibly rotated) displayed page, like :mod:`pdfminer` does.
+Nonetheless, results will not exactly match those obtained with
+:mod:`pdfminer`. For example, font names do not carry subset prefixes.
+
+.. autoclass:: PageIterator
+.. autofunction:: gather_text
+"""
+
+import ctypes
+
+import pypdfium2.raw as pdfium_c
+from pdfminer.layout import LAParams
+
+from pdf2data.pdf import TextLine
+
+
+# {{{ pdf page iterator
+
+class PageIterator:
+    """Like :class:`pdf2data.pdf.PageIterator`, but for a
+    :class:`pypdfium2.PdfDocument`.
+    """
+
+    def __init__(self, document, laparams=None):
+        if laparams is None:
+            laparams = LAParams()
+
+        if not len(document):
+            raise ValueError("document has no pages")
+
+        self.document = document
+        self.laparams = laparams
+
+        self._lines = None
+        self.i_page = 1
+        self.is_at_end = False
+
+    def advance(self):
+        if self.i_page >= len(self.document):
+            self.is_at_end = True
+
+        self._lines = None
+        self.i_page += 1
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = gather_text(
+                    self.document[self.i_page-1], self.laparams)
+
+        return self._lines
+
+# }}}
+
+
+# {{{ pdf text gathering
+
+def _get_page_ctm(page):
+    # same as in pdfminer.pdfinterp.PDFPageInterpreter.process_page
+    x0, y0, x1, y1 = page.get_mediabox()
+    rotation = page.get_rotation()
+
+    if rotation == 90:
+        return (0, -1, 1, 0, -y0, x1)
+    elif rotation == 180:
+        return (-1, 0, 0, -1, x1, y1)
+    elif rotation == 270:
+        return (0, 1, -1, 0, y1, -x0)
+    else:
+        return (1, 0, 0, 1, -x0, -y0)
+
+
+def _get_font_name(textpage, i_char):
+    buf_size = 256
+    while True:
+        buf = ctypes.create_string_buffer(buf_size)
+        name_size = pdfium_c.FPDFText_GetFontInfo(
+                textpage, i_char, buf, buf_size, None)
+        if name_size <= buf_size:
+            return buf.value.decode("utf-8", errors="replace")
+
+        buf_size = name_size
+
+
+def gather_text(page, laparams=None):
+    """
+    :arg page: a :class:`pypdfium2.PdfPage`
+    :arg laparams: a :class:`pdfminer.layout.LAParams` instance, of which
+        *char_margin* and *line_overlap* are used to decide whether
+        successive characters belong on the same line.
+    :returns: a list of :class:`~pdf2data.pdf.TextLine` instances
+    """
+    if laparams is None:
+        laparams = LAParams()
+
+    a, b, c, d, e, f = _get_page_ctm(page)
+    textpage = page.get_textpage()
+
+    lines = []
+
+    line_contents = []
+    fontname = None
+    lx0 = ly0 = lx1 = ly1 = None
+    prev_bbox = None
+    space_pending = False
+
+    def finish_line():
+        if line_contents:
+            lines.append(TextLine(
+                text="".join(line_contents),
+                fontname=fontname,
+                bbox=(lx0, ly0, lx1, ly1)))
+
+    for i_char in range(textpage.count_chars()):
+        char = chr(pdfium_c.FPDFText_GetUnicode(textpage, i_char))
+
+        if char in "\r\n":
+            finish_line()
+            line_contents = []
+            prev_bbox = None
+            space_pending = False
+            continue
+
+        if pdfium_c.FPDFText_IsGenerated(textpage, i_char) == 1:
+            # PDFium inserts spaces (with empty bounding boxes) where it
+            # detects word breaks. They may join the adjacent characters
+            # on a line, but only if those are close enough.
+            space_pending = prev_bbox is not None
+            continue
+
+        # {{{ transform bounding box into displayed page coordinates
+
+        left, bottom, right, top = textpage.get_charbox(i_char, loose=True)
+        cx0 = a*left + c*bottom + e
+        cy0 = b*left + d*bottom + f
+        cx1 = a*right + c*top + e
+        cy1 = b*right + d*top + f
+        cx0, cx1 = min(cx0, cx1), max(cx0, cx1)
+        cy0, cy1 = min(cy0, cy1), max(cy0, cy1)
+
+        # }}}
+
+        if prev_bbox is not None:
+            px0, py0, px1, py1 = prev_bbox
+            vert_overlap = min(py1, cy1) - max(py0, cy0)
+            horz_distance = max(cx0 - px1, px0 - cx1, 0)
+
+            max_horz_distance = laparams.char_margin*max(
+                    px1 - px0, cx1 - cx0)
+            if space_pending:
+                # allow for the width of the space, estimated as a third
+                # of the character height
+                max_horz_distance += (cy1 - cy0)/3
+
+            same_line = (
+                    vert_overlap > laparams.line_overlap*min(
+                        py1 - py0, cy1 - cy0)
+                    and horz_distance < max_horz_distance)
+        else:
+            same_line = False
+
+        if same_line:
+            if space_pending:
+                line_contents.append(" ")
+            line_contents.append(char)
+            lx0 = min(lx0, cx0)
+            ly0 = min(ly0, cy0)
+            lx1 = max(lx1, cx1)
+            ly1 = max(ly1, cy1)
+        else:
+            finish_line()
+            line_contents = [char]
+            fontname = _get_font_name(textpage, i_char)
+            lx0, ly0, lx1, ly1 = cx0, cy0, cx1, cy1
+
+        prev_bbox = (cx0, cy0, cx1, cy1)
+        space_pending = False
+
+    finish_line()
+
+    return lines
+
+# }}}
+
+# vim: foldmethod=marker
@@ -20,7 +20,12 @@ setup(name="pdf2data",
           ],
 
       python_requires='~=3.6',
-      install_requires=["pdfminer.six"],
+      install_requires=["pdfminer.six", "numpy"],
+      extras_require={
+          "numba": ["numba"],
+          "hyperscan": ["hyperscan"],
+          "pdfium": ["pypdfium2"],
+          },
 
       scripts=["read-uiuc-fin-statement"],
 
@@ -0,0 +1,169 @@
+__copyright__ = "Copyright (C) 2019 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import pytest
+
+from pdf2data.pdf import (
+    TextLine, _dump_page, _load_page, find_attr_group_matching, find_lines_with,
+    find_lines_with_many)
+
+
+def make_lines(*texts):
+    return [
+            TextLine(text=text, fontname="Helvetica", bbox=(0, i, 10, i+1))
+            for i, text in enumerate(texts)]
+
+
+def summarize(found):
+    return [(ln.text, i, match.group()) for ln, i, match in found]
+
+
+# {{{ find_lines_with_many
+
+def test_find_lines_with_many_leftmost():
+    lines = make_lines("abc", "cab", "xyz")
+    assert summarize(find_lines_with_many([r"b", r"a"], lines)) == [
+            ("abc", 1, "a"),
+            ("cab", 1, "a"),
+            ]
+    assert summarize(find_lines_with_many([r"ab", r"a"], lines)) == [
+            ("abc", 0, "ab"),
+            ("cab", 0, "ab"),
+            ]
+
+
+def test_find_lines_with_many_scoped_flags():
+    lines = make_lines("ABC", "abc")
+    # (?i) must only apply to the first regex.
+    assert summarize(find_lines_with_many([r"(?i)b", r"a"], lines)) == [
+            ("ABC", 0, "B"),
+            ("abc", 1, "a"),
+            ]
+    assert summarize(find_lines_with_many([r"x", r"(?i)a"], lines)) == [
+            ("ABC", 1, "A"),
+            ("abc", 1, "a"),
+            ]
+    assert summarize(find_lines_with_many([r"x", r"A"], lines)) == [
+            ("ABC", 1, "A"),
+            ]
+
+
+def test_find_lines_with_many_group_numbering():
+    lines = make_lines("key: value")
+    (_, i, match), = find_lines_with_many(
+            [r"(\d+)", r"(\w+): (\w+)"], lines)
+    assert i == 1
+    assert match.groups() == ("key", "value")
+
+
+def test_find_lines_with_many_shared_group_names():
+    lines = make_lines("ba", "ab", "c")
+    regexes = [r"(?P<x>a)", r"(?P<x>b)"]
+    assert summarize(find_lines_with_many(regexes, lines)) == [
+            ("ba", 1, "b"),
+            ("ab", 0, "a"),
+            ]
+
+
+@pytest.mark.parametrize(("regexes", "text"), [
+    ([r"(b)", r"(a)\1"], "aa"),
+    ([r"(b)", r"(a)(?(1)a|c)"], "ac"),
+    ([r"(b)", r"(a)(?(1)a|c)"], "aa"),
+    ([r"(b)", r"(?P<x>a)(?P=x)"], "aa"),
+    ])
+def test_find_lines_with_many_numbered_references(regexes, text):
+    lines = make_lines(text)
+    expected = summarize(
+            (ln, 1, match) for ln, match in find_lines_with(regexes[1], lines))
+    assert summarize(find_lines_with_many(regexes, lines)) == expected
+
+
+def test_find_lines_with_many_rejects_compiled():
+    import re
+    with pytest.raises(TypeError):
+        find_lines_with_many([re.compile("a")], make_lines("a"))
+
+# }}}
+
+
+# {{{ find_attr_group_matching
+
+def test_find_attr_group_matching_hyperscan_threads():
+    pytest.importorskip("hyperscan")
+    from concurrent.futures import ThreadPoolExecutor
+
+    lines = [
+            TextLine(
+                text=f"row {i} total {7*i}", fontname="Helvetica",
+                bbox=(0, i//3, 10, i//3 + 1))
+            for i in range(3000)]
+
+    def find(_):
+        return find_attr_group_matching(
+                [r"^row 30 ", r"total 210$"], "y0", lines, use_hyperscan=True)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(find, range(200)))
+
+    assert set(results) == {10}
+
+# }}}
+
+
+# {{{ page cache
+
+def test_page_cache_round_trip(tmp_path):
+    lines = [
+            TextLine(text=text, fontname=fontname, bbox=(0.5, i, 10.25, i+1))
+            for i, (text, fontname) in enumerate([
+                ("plain", "Helvetica"),
+                ("bold", "Helvetica-Bold"),
+                ("", "Helvetica"),
+                ("surrogate \udc80", "Times\udc80\x00"),
+                ("bytes", b"Courier\xff\x00"),
+                ("same as str", b"Helvetica"),
+                ("no font", None),
+                ])]
+
+    path = tmp_path / "page.npz"
+    _dump_page(path, lines)
+    loaded_lines = _load_page(path)
+
+    assert [
+            (ln.text, ln.fontname, ln.x0, ln.y0, ln.x1, ln.y1)
+            for ln in loaded_lines] == [
+            (ln.text, ln.fontname, ln.x0, ln.y0, ln.x1, ln.y1)
+            for ln in lines]
+    assert [type(ln.fontname) for ln in loaded_lines] == [
+            type(ln.fontname) for ln in lines]
+
+# }}}
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        exec(sys.argv[1])
+    else:
+        pytest.main([__file__])
+
+# vim: foldmethod=marker